@@ -4,42 +4,224 @@
 A simple OTLP (OpenTelemetry Protocol) test server that logs received traces.
 
 This server accepts OTLP traces over HTTP POST requests to /v1/traces endpoint
-and logs the received data in a human-readable format.
+and logs a one-line summary of each request; pass --verbose to log the full
+trace data in a human-readable format. JSON traces are also
+appended, one request per line, to per-minute NDJSON files in
+$TMPDIR/ecmaos/logs. Each request is flushed to the file as soon as it is
+received, so the files can be tailed while the server runs.
 
 Example use:
   python3 otlp-server.py
 
 The server will listen on http://localhost:4318 by default.
-You can configure the port with the --port argument.
+You can configure the port with the --port argument. Pass --asyncio to serve
+from a single aiohttp event loop instead of a thread per connection.
 
 Example use from browser:
   Set ECMAOS_OPENTELEMETRY_ENDPOINT=http://localhost:4318/v1/traces
+
+Optional dependencies:
+  orjson - faster JSON parsing and serialization (falls back to the stdlib json)
+  opentelemetry-proto - decode application/x-protobuf traces (otherwise logged as hex)
+  aiohttp - required for --asyncio
+  brotli>=1.1 - accept Content-Encoding: br request bodies (gzip is always supported)
 """
 
 import argparse
+import asyncio
+import atexit
 import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import queue
+import sys
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
 from typing import Optional
-from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from google.protobuf.internal import api_implementation
+    from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+except ImportError:
+    api_implementation = None
+    ExportTraceServiceRequest = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
 
 BIND_ADDRESS = '0.0.0.0'
 DEFAULT_PORT = 4318
+DEFAULT_WORKERS = (os.cpu_count() or 1) * 2
+RECV_BUFFER_MIN = 64 * 1024
+RECV_BUFFER_MAX = 8 * 1024 * 1024
+# Largest request body accepted after undoing Content-Encoding
+MAX_DECOMPRESSED_SIZE = 64 * 1024 * 1024
 LOG_DIR = Path(os.environ.get('TMPDIR', '/tmp')) / 'ecmaos' / 'logs'
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Content-Encoding, Accept',
+    'Access-Control-Max-Age': '3600',
+}
+
+# QueueHandler.prepare() still merges msg % args (and any traceback) on the
+# calling thread; the single listener thread then applies the timestamp/level
+# format and writes to a block-buffered stderr stream, flushed once per record.
+_log_queue = queue.Queue(-1)
+_log_stream = open(sys.stderr.fileno(), 'w', buffering=8192, encoding='utf-8',
+                   errors='backslashreplace', closefd=False)
+_log_stream_handler = logging.StreamHandler(_log_stream)
+_log_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler)
+
+# Attached to the root logger so third-party records (e.g. aiohttp) share the
+# same format and queue as ours
+logging.root.setLevel(logging.INFO)
+logging.root.addHandler(logging.handlers.QueueHandler(_log_queue))
 logger = logging.getLogger(__name__)
 
+# Per-thread receive buffer reused across requests by OTLPHandler._read_body
+_recv_buf = threading.local()
+
+
+def _json_loads(body):
+    """Parse a JSON document from raw bytes or any bytes-like buffer."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(str(body, 'utf-8'))
+
+
+def _decompress(body, content_encoding: str):
+    """Undo the Content-Encoding of a request body.
+
+    Output is capped at MAX_DECOMPRESSED_SIZE so a small compressed body
+    cannot expand into an arbitrarily large one.
+    """
+    encoding = content_encoding.strip().lower()
+    if encoding in ('', 'identity'):
+        return body
+    elif encoding in ('gzip', 'x-gzip'):
+        decompressor = zlib.decompressobj(wbits=31)
+        data = decompressor.decompress(body, MAX_DECOMPRESSED_SIZE + 1)
+        finished = decompressor.eof
+    elif encoding == 'br' and brotli is not None:
+        decompressor = brotli.Decompressor()
+        data = decompressor.process(bytes(body), output_buffer_limit=MAX_DECOMPRESSED_SIZE + 1)
+        finished = decompressor.is_finished()
+    else:
+        raise ValueError(f'Unsupported Content-Encoding: {content_encoding}')
+    if len(data) > MAX_DECOMPRESSED_SIZE:
+        raise ValueError(f'Decompressed body exceeds {MAX_DECOMPRESSED_SIZE} bytes')
+    if not finished:
+        raise ValueError(f'Truncated {encoding} body')
+    return data
+
+
+def _json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize an object to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+# Fixed response bodies, serialized once at import
+_OK_JSON = _json_dumps({'status': 'ok'})
+_NOT_FOUND_JSON = _json_dumps({'error': 'Not found'})
+_EMPTY_BODY_JSON = _json_dumps({'status': 'ok', 'message': 'Empty body'})
+_READ_FAILED_JSON = _json_dumps({'status': 'ok', 'error': 'Failed to read body'})
+_HEALTH_JSON = _json_dumps({
+    'status': 'ok',
+    'service': 'otlp-server',
+    'endpoint': '/v1/traces'
+})
+
+
+class RollingTraceFile:
+    """Append-only NDJSON trace log that rolls over to a new file every minute.
+
+    All request threads share one open handle, so a record is never split
+    across another thread's write. Each record is flushed as soon as it is
+    written. The lock also serializes rotation.
+    """
+
+    def __init__(self, directory: Path):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._minute = None
+        self._file = None
+        self.path = None
+
+    def write(self, data: dict) -> Path:
+        """Append one JSON document as a line and return the file it went to."""
+        line = _json_dumps(data) + b'\n'
+        minute = int(time.time() // 60)
+        with self._lock:
+            if minute != self._minute:
+                self._rotate(minute)
+            self._file.write(line)
+            self._file.flush()
+            return self.path
+
+    def _rotate(self, minute: int) -> None:
+        """Close the current file and open the one for the given minute."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        timestamp = time.strftime('%Y-%m-%d_%H:%M', time.localtime(minute * 60))
+        self.path = self._directory / f'{timestamp}.jsonl'
+        self._file = open(self.path, 'ab', buffering=65536)
+        self._minute = minute
+
+    def close(self) -> None:
+        """Flush and close the current file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._minute = None
+
+
+trace_file = RollingTraceFile(LOG_DIR)
+atexit.register(trace_file.close)
+
 
 class OTLPHandler(BaseHTTPRequestHandler):
     """HTTP request handler for OTLP traces endpoint."""
 
+    # Set from --verbose; when False only a one-line summary is logged per request
+    verbose_traces = False
+
+    # Socket timeout in seconds, so idle or stalled connections release their thread
+    timeout = 30
+
+    # OTLP/JSON AnyValue carries exactly one populated key; map it to a formatter
+    _VALUE_FORMATTERS = {
+        'stringValue': str,
+        'intValue': str,
+        'doubleValue': str,
+        'boolValue': str,
+        'arrayValue': lambda v: f"[{', '.join(OTLPHandler._format_value(x) for x in v.get('values', []))}]",
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
     
@@ -48,32 +230,31 @@ class OTLPHandler(BaseHTTPRequestHandler):
         try:
             super().handle_one_request()
         except Exception as e:
-            logger.error(f'Error in handle_one_request: {e}', exc_info=True)
+            logger.error('Error in handle_one_request: %s', e, exc_info=True)
             raise
     
     def handle(self):
         """Override handle to log all connections."""
-        logger.info(f'New connection from {self.client_address}')
+        logger.info('New connection from %s', self.client_address)
         try:
             super().handle()
         except BrokenPipeError:
-            logger.warning(f'Client {self.client_address} disconnected (broken pipe)')
+            logger.warning('Client %s disconnected (broken pipe)', self.client_address)
         except Exception as e:
-            logger.error(f'Error handling request: {e}', exc_info=True)
+            logger.error('Error handling request: %s', e, exc_info=True)
         finally:
-            logger.info(f'Connection from {self.client_address} closed')
+            logger.info('Connection from %s closed', self.client_address)
 
     def _send_cors_headers(self):
         """Send CORS headers for cross-origin requests."""
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Accept')
-        self.send_header('Access-Control-Max-Age', '3600')
+        for header, value in CORS_HEADERS.items():
+            self.send_header(header, value)
 
     def do_OPTIONS(self):
         """Handle CORS preflight requests."""
-        logger.info(f'Received OPTIONS request to {self.path}')
-        logger.info(f'OPTIONS Headers: {dict(self.headers)}')
+        logger.info('Received OPTIONS request to %s', self.path)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('OPTIONS Headers:\n%s', str(self.headers).rstrip())
         self.send_response(200)
         self._send_cors_headers()
         self.end_headers()
@@ -81,48 +262,45 @@ class OTLPHandler(BaseHTTPRequestHandler):
 
     def do_GET(self):
         """Handle GET requests for health check."""
-        parsed_path = urlparse(self.path)
+        path = self.path.partition('?')[0]
         
-        if parsed_path.path == '/health' or parsed_path.path == '/':
+        if path in ('/', '/health'):
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self._send_cors_headers()
             self.end_headers()
-            self.wfile.write(json.dumps({
-                'status': 'ok',
-                'service': 'otlp-server',
-                'endpoint': '/v1/traces'
-            }).encode())
+            self.wfile.write(_HEALTH_JSON)
             return
         
         self.send_response(404)
         self.send_header('Content-Type', 'application/json')
         self._send_cors_headers()
         self.end_headers()
-        self.wfile.write(json.dumps({'error': 'Not found'}).encode())
+        self.wfile.write(_NOT_FOUND_JSON)
 
     def do_POST(self):
         """Handle POST requests to /v1/traces endpoint."""
-        parsed_path = urlparse(self.path)
+        path = self.path.partition('?')[0]
         
-        logger.info(f'Received POST request to {self.path}')
-        logger.info(f'Headers: {dict(self.headers)}')
+        logger.info('Received POST request to %s', self.path)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Headers:\n%s', str(self.headers).rstrip())
         
-        if parsed_path.path != '/v1/traces':
-            logger.warning(f'404: Path {parsed_path.path} not found')
+        if path != '/v1/traces':
+            logger.warning('404: Path %s not found', path)
             self.send_response(404)
             self.send_header('Content-Type', 'application/json')
             self._send_cors_headers()
             self.end_headers()
-            self.wfile.write(json.dumps({'error': 'Not found'}).encode())
+            self.wfile.write(_NOT_FOUND_JSON)
             return
 
         content_length_header = self.headers.get('Content-Length')
         content_length = int(content_length_header) if content_length_header else 0
         content_type = self.headers.get('Content-Type', '')
         
-        logger.info(f'Content-Type: {content_type}')
-        logger.info(f'Content-Length header: {content_length_header}')
+        logger.info('Content-Type: %s', content_type)
+        logger.info('Content-Length header: %s', content_length_header)
         
         # sendBeacon may not send Content-Length, so read available data
         if content_length == 0:
@@ -135,50 +313,45 @@ class OTLPHandler(BaseHTTPRequestHandler):
                     self.send_header('Content-Type', 'application/json')
                     self._send_cors_headers()
                     self.end_headers()
-                    self.wfile.write(json.dumps({'status': 'ok', 'message': 'Empty body'}).encode())
+                    self.wfile.write(_EMPTY_BODY_JSON)
                     return
                 content_length = len(body)
-                logger.info(f'Read {content_length} bytes without Content-Length header (likely sendBeacon)')
+                logger.info('Read %d bytes without Content-Length header (likely sendBeacon)', content_length)
             except Exception as e:
-                logger.error(f'Error reading request body: {e}')
+                logger.error('Error reading request body: %s', e)
                 self.send_response(200)
                 self.send_header('Content-Type', 'application/json')
                 self._send_cors_headers()
                 self.end_headers()
-                self.wfile.write(json.dumps({'status': 'ok', 'error': 'Failed to read body'}).encode())
+                self.wfile.write(_READ_FAILED_JSON)
                 return
         else:
             try:
-                body = self.rfile.read(content_length)
+                body = self._read_body(content_length)
             except Exception as e:
-                logger.error(f'Error reading request body: {e}')
+                logger.error('Error reading request body: %s', e)
                 self.send_response(200)
                 self.send_header('Content-Type', 'application/json')
                 self._send_cors_headers()
                 self.end_headers()
-                self.wfile.write(json.dumps({'status': 'ok', 'error': 'Failed to read body'}).encode())
+                self.wfile.write(_READ_FAILED_JSON)
                 return
         
-        logger.info(f'Successfully read {len(body)} bytes')
+        logger.info('Successfully read %d bytes', len(body))
         
         try:
-            if 'application/json' in content_type:
-                data = json.loads(body.decode('utf-8'))
-                self._log_traces(data)
-                self._save_traces_to_file(data)
-            elif 'application/x-protobuf' in content_type or 'application/octet-stream' in content_type:
-                logger.info('Received Protobuf data (not decoded, showing hex):')
-                logger.info(f'  {body.hex()[:100]}...' if len(body) > 100 else f'  {body.hex()}')
-            else:
-                logger.info(f'Received data with unknown content type: {content_type}')
-                logger.info(f'  First 200 bytes: {body[:200]}')
+            with self.server.work_slots:
+                body = _decompress(body, self.headers.get('Content-Encoding', ''))
+                data = self._process_body(body, content_type)
+                if data is not None:
+                    self._save_traces_to_file(data)
         except Exception as e:
-            logger.error(f'Error processing request: {e}', exc_info=True)
+            logger.error('Error processing request: %s', e, exc_info=True)
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self._send_cors_headers()
             self.end_headers()
-            self.wfile.write(json.dumps({'status': 'error', 'error': str(e)}).encode())
+            self.wfile.write(_json_dumps({'status': 'error', 'error': str(e)}))
             return
 
         try:
@@ -186,56 +359,102 @@ class OTLPHandler(BaseHTTPRequestHandler):
             self.send_header('Content-Type', 'application/json')
             self._send_cors_headers()
             self.end_headers()
-            response = json.dumps({'status': 'ok'}).encode()
-            self.wfile.write(response)
+            self.wfile.write(_OK_JSON)
             self.wfile.flush()
             logger.info('Response sent successfully')
         except Exception as e:
-            logger.error(f'Error sending response: {e}', exc_info=True)
+            logger.error('Error sending response: %s', e, exc_info=True)
 
-    def _log_traces(self, data: dict) -> None:
-        """Log trace data in a human-readable format."""
-        logger.info('=' * 80)
-        logger.info('Received OTLP Trace Data:')
-        logger.info('=' * 80)
+    def _read_body(self, content_length: int) -> memoryview:
+        """Read the request body into this thread's reusable receive buffer.
+
+        The returned view is only valid until the next request on the same
+        thread. Buffers larger than RECV_BUFFER_MAX are not kept for reuse.
+        """
+        buf = getattr(_recv_buf, 'buf', None)
+        if buf is None or len(buf) < content_length:
+            buf = bytearray(max(content_length, RECV_BUFFER_MIN))
+            if len(buf) <= RECV_BUFFER_MAX:
+                _recv_buf.buf = buf
+        view = memoryview(buf)[:content_length]
+        return view[:self.rfile.readinto(view)]
+
+    @classmethod
+    def _process_body(cls, body, content_type: str) -> Optional[dict]:
+        """Decode and log a request body.
+
+        Returns the parsed OTLP/JSON document so the caller can save it, or
+        None when there is nothing to save.
+        """
+        if 'application/json' in content_type:
+            data = _json_loads(body)
+            if cls.verbose_traces:
+                cls._log_traces(data)
+            else:
+                logger.info('Received %d resource spans, %d bytes', len(data.get('resourceSpans', [])), len(body))
+            return data
+        elif 'application/x-protobuf' in content_type or 'application/octet-stream' in content_type:
+            if ExportTraceServiceRequest is not None:
+                trace_request = ExportTraceServiceRequest()
+                trace_request.ParseFromString(body)
+                if cls.verbose_traces:
+                    cls._log_traces_pb(trace_request)
+                else:
+                    logger.info('Received %d resource spans, %d bytes', len(trace_request.resource_spans), len(body))
+            else:
+                logger.info('Received Protobuf data (opentelemetry-proto not installed, showing hex):')
+                logger.info('  %s%s', body[:50].hex(), '...' if len(body) > 50 else '')
+        else:
+            logger.info('Received data with unknown content type: %s', content_type)
+            logger.info('  First 200 bytes: %s', bytes(body[:200]))
+        return None
+
+    @classmethod
+    def _log_traces(cls, data: dict) -> None:
+        """Log trace data in a human-readable format as a single log record."""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        parts = []
+        append = parts.append
+        fmt = cls._format_value
+        append('=' * 80)
+        append('Received OTLP Trace Data:')
+        append('=' * 80)
         
         resource_spans = data.get('resourceSpans', [])
-        logger.info(f'Number of resource spans: {len(resource_spans)}')
+        append(f'Number of resource spans: {len(resource_spans)}')
         
         for idx, resource_span in enumerate(resource_spans):
-            logger.info(f'\n--- Resource Span {idx + 1} ---')
+            append(f'\n--- Resource Span {idx + 1} ---')
             
             resource = resource_span.get('resource', {})
             attributes = resource.get('attributes', [])
             if attributes:
-                logger.info('Resource Attributes:')
-                for attr in attributes:
-                    key = attr.get('key', '')
-                    value = attr.get('value', {})
-                    logger.info(f'  {key}: {self._format_value(value)}')
+                append('Resource Attributes:')
+                append('\n'.join(f'  {attr.get("key", "")}: {fmt(attr.get("value", {}))}' for attr in attributes))
             
             scope_spans = resource_span.get('scopeSpans', [])
-            logger.info(f'Number of scope spans: {len(scope_spans)}')
+            append(f'Number of scope spans: {len(scope_spans)}')
             
             for scope_idx, scope_span in enumerate(scope_spans):
-                logger.info(f'\n  --- Scope Span {scope_idx + 1} ---')
+                append(f'\n  --- Scope Span {scope_idx + 1} ---')
                 
                 scope = scope_span.get('scope', {})
                 if scope:
-                    logger.info(f'  Scope Name: {scope.get("name", "unknown")}')
-                    logger.info(f'  Scope Version: {scope.get("version", "unknown")}')
+                    append(f'  Scope Name: {scope.get("name", "unknown")}')
+                    append(f'  Scope Version: {scope.get("version", "unknown")}')
                 
                 spans = scope_span.get('spans', [])
-                logger.info(f'  Number of spans: {len(spans)}')
+                append(f'  Number of spans: {len(spans)}')
                 
                 for span_idx, span in enumerate(spans):
-                    logger.info(f'\n    --- Span {span_idx + 1} ---')
-                    logger.info(f'    Trace ID: {span.get("traceId", "unknown")}')
-                    logger.info(f'    Span ID: {span.get("spanId", "unknown")}')
-                    logger.info(f'    Name: {span.get("name", "unknown")}')
-                    logger.info(f'    Kind: {span.get("kind", "unknown")}')
-                    logger.info(f'    Start Time: {span.get("startTimeUnixNano", "unknown")}')
-                    logger.info(f'    End Time: {span.get("endTimeUnixNano", "unknown")}')
+                    append(f'\n    --- Span {span_idx + 1} ---')
+                    append(f'    Trace ID: {span.get("traceId", "unknown")}')
+                    append(f'    Span ID: {span.get("spanId", "unknown")}')
+                    append(f'    Name: {span.get("name", "unknown")}')
+                    append(f'    Kind: {span.get("kind", "unknown")}')
+                    append(f'    Start Time: {span.get("startTimeUnixNano", "unknown")}')
+                    append(f'    End Time: {span.get("endTimeUnixNano", "unknown")}')
                     
                     duration = None
                     if 'startTimeUnixNano' in span and 'endTimeUnixNano' in span:
@@ -243,110 +462,299 @@ class OTLPHandler(BaseHTTPRequestHandler):
                             start = int(span['startTimeUnixNano'])
                             end = int(span['endTimeUnixNano'])
                             duration = (end - start) / 1_000_000
-                            logger.info(f'    Duration: {duration:.2f} ms')
+                            append(f'    Duration: {duration:.2f} ms')
                         except (ValueError, TypeError):
                             pass
                     
                     attributes = span.get('attributes', [])
                     if attributes:
-                        logger.info('    Attributes:')
-                        for attr in attributes:
-                            key = attr.get('key', '')
-                            value = attr.get('value', {})
-                            logger.info(f'      {key}: {self._format_value(value)}')
+                        append('    Attributes:')
+                        append('\n'.join(f'      {attr.get("key", "")}: {fmt(attr.get("value", {}))}' for attr in attributes))
                     
                     events = span.get('events', [])
                     if events:
-                        logger.info(f'    Events ({len(events)}):')
+                        append(f'    Events ({len(events)}):')
                         for event in events:
-                            logger.info(f'      - {event.get("name", "unknown")} at {event.get("timeUnixNano", "unknown")}')
+                            append(f'      - {event.get("name", "unknown")} at {event.get("timeUnixNano", "unknown")}')
                     
                     status = span.get('status', {})
                     if status:
                         code = status.get('code', 'unknown')
                         message = status.get('message', '')
-                        logger.info(f'    Status: {code}' + (f' - {message}' if message else ''))
+                        append(f'    Status: {code}' + (f' - {message}' if message else ''))
         
-        logger.info('=' * 80)
-        logger.info('Raw JSON (first 500 chars):')
-        logger.info(json.dumps(data, indent=2)[:500])
-        logger.info('=' * 80)
+        append('=' * 80)
+        append('Raw JSON (first 500 chars):')
+        append(_json_dumps(data, indent=True)[:500].decode('utf-8', 'replace'))
+        append('=' * 80)
+        logger.info('\n'.join(parts))
 
-    def _format_value(self, value: dict) -> str:
-        """Format an attribute value for display."""
-        if 'stringValue' in value:
-            return value['stringValue']
-        elif 'intValue' in value:
-            return str(value['intValue'])
-        elif 'doubleValue' in value:
-            return str(value['doubleValue'])
-        elif 'boolValue' in value:
-            return str(value['boolValue'])
-        elif 'arrayValue' in value:
-            return f"[{', '.join(str(self._format_value(v)) for v in value['arrayValue'].get('values', []))}]"
+    @classmethod
+    def _log_traces_pb(cls, trace_request) -> None:
+        """Log a decoded ExportTraceServiceRequest as a single log record."""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        parts = []
+        append = parts.append
+        fmt = cls._format_pb_value
+        append('=' * 80)
+        append('Received OTLP Trace Data (protobuf):')
+        append('=' * 80)
+        
+        resource_spans = trace_request.resource_spans
+        append(f'Number of resource spans: {len(resource_spans)}')
+        
+        for idx, resource_span in enumerate(resource_spans):
+            append(f'\n--- Resource Span {idx + 1} ---')
+            
+            attributes = resource_span.resource.attributes
+            if attributes:
+                append('Resource Attributes:')
+                append('\n'.join(f'  {attr.key}: {fmt(attr.value)}' for attr in attributes))
+            
+            scope_spans = resource_span.scope_spans
+            append(f'Number of scope spans: {len(scope_spans)}')
+            
+            for scope_idx, scope_span in enumerate(scope_spans):
+                append(f'\n  --- Scope Span {scope_idx + 1} ---')
+                
+                if scope_span.HasField('scope'):
+                    append(f'  Scope Name: {scope_span.scope.name or "unknown"}')
+                    append(f'  Scope Version: {scope_span.scope.version or "unknown"}')
+                
+                spans = scope_span.spans
+                append(f'  Number of spans: {len(spans)}')
+                
+                for span_idx, span in enumerate(spans):
+                    append(f'\n    --- Span {span_idx + 1} ---')
+                    append(f'    Trace ID: {span.trace_id.hex()}')
+                    append(f'    Span ID: {span.span_id.hex()}')
+                    append(f'    Name: {span.name}')
+                    append(f'    Kind: {span.kind}')
+                    append(f'    Start Time: {span.start_time_unix_nano}')
+                    append(f'    End Time: {span.end_time_unix_nano}')
+                    
+                    if span.start_time_unix_nano and span.end_time_unix_nano:
+                        duration = (span.end_time_unix_nano - span.start_time_unix_nano) / 1_000_000
+                        append(f'    Duration: {duration:.2f} ms')
+                    
+                    if span.attributes:
+                        append('    Attributes:')
+                        append('\n'.join(f'      {attr.key}: {fmt(attr.value)}' for attr in span.attributes))
+                    
+                    if span.events:
+                        append(f'    Events ({len(span.events)}):')
+                        for event in span.events:
+                            append(f'      - {event.name} at {event.time_unix_nano}')
+                    
+                    if span.HasField('status'):
+                        code = span.status.code
+                        message = span.status.message
+                        append(f'    Status: {code}' + (f' - {message}' if message else ''))
+        
+        append('=' * 80)
+        logger.info('\n'.join(parts))
+
+    @classmethod
+    def _format_pb_value(cls, value) -> str:
+        """Format a protobuf AnyValue for display."""
+        kind = value.WhichOneof('value')
+        if kind == 'array_value':
+            return f"[{', '.join(cls._format_pb_value(v) for v in value.array_value.values)}]"
+        elif kind == 'kvlist_value':
+            return f"{{{', '.join(f'{kv.key}: {cls._format_pb_value(kv.value)}' for kv in value.kvlist_value.values)}}}"
+        elif kind == 'bytes_value':
+            return value.bytes_value.hex()
+        elif kind is None:
+            return 'null'
         else:
+            return str(getattr(value, kind))
+
+    @classmethod
+    def _format_value(cls, value: dict) -> str:
+        """Format an attribute value for display."""
+        key = next(iter(value), None)
+        if key is None:
+            return 'null'
+        formatter = cls._VALUE_FORMATTERS.get(key)
+        if formatter is None:
             return str(value)
+        return formatter(value[key])
 
-    def _save_traces_to_file(self, data: dict) -> None:
-        """Save trace data to a timestamped JSON file."""
+    @classmethod
+    def _save_traces_to_file(cls, data: dict) -> None:
+        """Append trace data to the current per-minute NDJSON file (pretty-print with jq)."""
         try:
-            LOG_DIR.mkdir(parents=True, exist_ok=True)
-            
-            timestamp = datetime.now().strftime('%Y-%m-%d_%H:%M:%S')
-            filename = LOG_DIR / f'{timestamp}.json'
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f'Saved trace data to {filename}')
+            filename = trace_file.write(data)
+            logger.info('Saved trace data to %s', filename)
         except Exception as e:
-            logger.error(f'Failed to save trace data to file: {e}', exc_info=True)
+            logger.error('Failed to save trace data to file: %s', e, exc_info=True)
 
     def log_message(self, format, *args):
         """Override to use our logger instead of stderr."""
-        logger.debug(f'{self.address_string()} - {format % args}')
+        logger.debug('%s - ' + format, self.address_string(), *args)
     
     def log_request(self, code='-', size='-'):
         """Override to reduce default request logging."""
         pass
 
 
-def run_server(port: int = DEFAULT_PORT) -> None:
-    """Run the OTLP test server."""
-    server_address = (BIND_ADDRESS, port)
-    
-    # Test if port is already in use
-    import socket
-    test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    test_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    try:
-        test_socket.bind(server_address)
-        test_socket.listen(1)
-        test_socket.close()
-    except OSError as e:
-        logger.error(f'Port {port} is already in use: {e}')
-        logger.error('Please stop the existing server or use a different port with --port')
-        return
-    
-    httpd = HTTPServer(server_address, OTLPHandler)
-    httpd.allow_reuse_address = True
-    
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    
+class OTLPHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that caps how many requests process traces at once.
+
+    Every connection gets its own daemon thread, so idle sockets such as
+    browser preconnects never hold up other clients and shutdown never waits
+    on them. Decoding, logging and saving a trace batch is the expensive
+    part; at most ``max_workers`` requests do that concurrently while the
+    rest wait on ``work_slots``.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, max_workers: int = DEFAULT_WORKERS):
+        self.work_slots = threading.BoundedSemaphore(max_workers)
+        super().__init__(server_address, handler_class)
+
+
+def _log_startup(port: int, mode: str) -> None:
+    """Log the server's endpoints and configuration."""
     logger.info(f'OTLP test server starting...')
     logger.info(f'Listening on http://{BIND_ADDRESS}:{port}')
     logger.info(f'OTLP traces endpoint: http://localhost:{port}/v1/traces')
     logger.info(f'Health check: http://localhost:{port}/health')
     logger.info(f'Trace logs directory: {LOG_DIR}')
+    if api_implementation is not None:
+        implementation = api_implementation.Type()
+        logger.info(f'Protobuf implementation: {implementation}')
+        if implementation == 'python':
+            logger.warning('Pure-Python protobuf is slow; install a protobuf wheel with the upb/cpp backend')
+    else:
+        logger.info('Protobuf decoding disabled (pip install opentelemetry-proto to enable)')
+    logger.info(mode)
     logger.info('Press Ctrl+C to stop the server')
     logger.info('=' * 80)
     logger.info('Waiting for connections...')
+
+
+def run_server(port: int = DEFAULT_PORT, workers: int = DEFAULT_WORKERS) -> None:
+    """Run the OTLP test server."""
+    log_listener.start()
+    try:
+        server_address = (BIND_ADDRESS, port)
+        
+        try:
+            httpd = OTLPHTTPServer(server_address, OTLPHandler, max_workers=workers)
+        except OSError as e:
+            logger.error(f'Port {port} is already in use: {e}')
+            logger.error('Please stop the existing server or use a different port with --port')
+            return
+        
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        
+        _log_startup(port, f'Concurrent trace workers: {workers}')
+        
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            logger.info('\nShutting down server...')
+        finally:
+            httpd.server_close()
+    finally:
+        log_listener.stop()
+
+
+def _json_response(body: bytes, status: int = 200) -> 'web.Response':
+    """Build an aiohttp JSON response carrying the CORS headers."""
+    return web.Response(status=status, body=body, content_type='application/json', headers=CORS_HEADERS)
+
+
+async def _handle_async_traces(request: 'web.Request') -> 'web.Response':
+    """Handle POST /v1/traces on the aiohttp server."""
+    logger.info('Received POST request to %s', request.path_qs)
+    body = await request.read()
+    if not body:
+        logger.warning('Empty request body received')
+        return _json_response(_EMPTY_BODY_JSON)
     
+    logger.info('Successfully read %d bytes', len(body))
+    
+    try:
+        body = _decompress(body, request.headers.get('Content-Encoding', ''))
+        data = OTLPHandler._process_body(body, request.headers.get('Content-Type', ''))
+        if data is not None:
+            await asyncio.get_running_loop().run_in_executor(None, OTLPHandler._save_traces_to_file, data)
+    except Exception as e:
+        logger.error('Error processing request: %s', e, exc_info=True)
+        return _json_response(_json_dumps({'status': 'error', 'error': str(e)}))
+    
+    return _json_response(_OK_JSON)
+
+
+async def _handle_async_health(request: 'web.Request') -> 'web.Response':
+    """Handle GET health checks on the aiohttp server."""
+    return _json_response(_HEALTH_JSON)
+
+
+async def _handle_async_options(request: 'web.Request') -> 'web.Response':
+    """Handle CORS preflight requests on the aiohttp server."""
+    logger.info('Received OPTIONS request to %s', request.path_qs)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('OPTIONS Headers:\n%s', '\n'.join(f'{k}: {v}' for k, v in request.headers.items()))
+    return web.Response(headers=CORS_HEADERS)
+
+
+async def _handle_async_not_found(request: 'web.Request') -> 'web.Response':
+    """Answer any other method and path with a JSON 404."""
+    logger.warning('404: Path %s not found', request.path)
+    return _json_response(_NOT_FOUND_JSON, status=404)
+
+
+async def _serve_async(port: int) -> None:
+    """Serve the OTLP endpoints from the running event loop until cancelled."""
+    # client_max_size=0 disables aiohttp's 1 MiB body limit, matching the threaded server
+    app = web.Application(client_max_size=0)
+    app.router.add_post('/v1/traces', _handle_async_traces)
+    app.router.add_get('/', _handle_async_health)
+    app.router.add_get('/health', _handle_async_health)
+    app.router.add_route('OPTIONS', '/{tail:.*}', _handle_async_options)
+    app.router.add_route('*', '/{tail:.*}', _handle_async_not_found)
+    
+    # Bodies are decoded by _decompress, like the threaded server, so encoding
+    # errors and the size cap produce the same JSON error response with CORS
+    runner = web.AppRunner(app, access_log=None, auto_decompress=False)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, BIND_ADDRESS, port)
+        try:
+            await site.start()
+        except OSError as e:
+            logger.error(f'Port {port} is already in use: {e}')
+            logger.error('Please stop the existing server or use a different port with --port')
+            return
+        
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        
+        _log_startup(port, 'Serving from an aiohttp event loop')
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def run_async_server(port: int = DEFAULT_PORT) -> None:
+    """Run the OTLP test server on an aiohttp event loop."""
+    log_listener.start()
     try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        logger.info('\nShutting down server...')
-        httpd.shutdown()
+        if web is None:
+            logger.error('--asyncio requires aiohttp (pip install aiohttp)')
+            return
+        
+        try:
+            asyncio.run(_serve_async(port))
+        except KeyboardInterrupt:
+            logger.info('\nShutting down server...')
+    finally:
+        log_listener.stop()
 
 
 if __name__ == '__main__':
@@ -359,6 +767,27 @@ if __name__ == '__main__':
         default=DEFAULT_PORT,
         help=f'Port to listen on (default: {DEFAULT_PORT})'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Maximum number of requests processing traces at once (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Log the full contents of every received trace'
+    )
+    parser.add_argument(
+        '--asyncio',
+        action='store_true',
+        help='Serve from an aiohttp event loop instead of a thread per connection (requires aiohttp)'
+    )
     args = parser.parse_args()
     
-    run_server(args.port)
+    OTLPHandler.verbose_traces = args.verbose
+    
+    if args.asyncio:
+        run_async_server(args.port)
+    else:
+        run_server(args.port, args.workers)